@@ -1,149 +1,403 @@
+import json
+import os
 import pickle
-from collections import UserDict
-from datetime import datetime, timedelta
-import re
+import stat
+import sys
+import tempfile
+from bisect import bisect_left, bisect_right, insort
+from calendar import isleap
+from collections.abc import MutableMapping
+from datetime import date, datetime, timedelta
+from functools import wraps
+from operator import itemgetter
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_INVALID_PHONE_MSG = "Invalid phone number. It must contain exactly 10 digits."
+_INVALID_BIRTHDAY_MSG = "Invalid date format. Use DD.MM.YYYY"
+
+def _valid_phone(value):
+    return isinstance(value, str) and len(value) == 10 and value.isdecimal()
+
+class Birthday:
+    __slots__ = ("value",)
 
-class Field:
     def __init__(self, value):
-        self.value = value
+        if len(value) != 10 or value[2] != '.' or value[5] != '.':
+            raise ValueError(_INVALID_BIRTHDAY_MSG)
+        day, month, year = value[0:2], value[3:5], value[6:10]
+        if not (day + month + year).isdecimal():
+            raise ValueError(_INVALID_BIRTHDAY_MSG)
+        try:
+            self.value = date(int(year), int(month), int(day))
+        except ValueError:
+            raise ValueError(_INVALID_BIRTHDAY_MSG)
 
     def __str__(self):
-        return str(self.value)
-
-class Name(Field):
-    pass
-
-class Phone(Field):
-    def __init__(self, value):
-        if self.validate(value):
-            super().__init__(value)
-        else:
-            raise ValueError("Invalid phone number. It must contain exactly 10 digits.")
+        return self.value.strftime('%d.%m.%Y')
 
-    @staticmethod
-    def validate(value):
-        return bool(re.fullmatch(r"\d{10}", value))
+_FEB_28 = 59
+_FEB_29 = 60
 
-class Birthday(Field):
-    def __init__(self, value):
-        try:
-            self.value = datetime.strptime(value, "%d.%m.%Y")
-        except ValueError:
-            raise ValueError("Invalid date format. Use DD.MM.YYYY")
+def _birthday_key(value):
+    # Day of year in a leap year, so every (month, day) gets its own key
+    return date(2000, value.month, value.day).timetuple().tm_yday
 
 class Record:
+    __slots__ = ("name", "_phones", "birthday", "_bday_doy")
+
     def __init__(self, name):
-        self.name = Name(name)
-        self.phones = []
+        self.name = name
+        self._phones = {}
         self.birthday = None
+        self._bday_doy = None
+
+    @property
+    def phones(self):
+        return list(self._phones)
 
     def add_phone(self, phone):
-        self.phones.append(Phone(phone))
+        if not _valid_phone(phone):
+            raise ValueError(_INVALID_PHONE_MSG)
+        self._phones[phone] = None
 
     def remove_phone(self, phone):
-        self.phones = [p for p in self.phones if p.value != phone]
+        self._phones.pop(phone, None)
 
     def edit_phone(self, old_phone, new_phone):
-        if not Phone.validate(new_phone):
-            raise ValueError("Invalid phone number. It must contain exactly 10 digits.")
-        for phone in self.phones:
-            if phone.value == old_phone:
-                phone.value = new_phone
-                break
+        if not _valid_phone(new_phone):
+            raise ValueError(_INVALID_PHONE_MSG)
+        if old_phone in self._phones:
+            # Rebuild rather than pop/insert so the edited number keeps its position
+            self._phones = {new_phone if p == old_phone else p: None for p in self._phones}
 
     def find_phone(self, phone):
-        for p in self.phones:
-            if p.value == phone:
-                return p
-        return None
+        return phone if phone in self._phones else None
 
     def add_birthday(self, birthday):
         self.birthday = Birthday(birthday)
+        self._bday_doy = _birthday_key(self.birthday.value)
 
     def __str__(self):
-        phones_str = '; '.join(p.value for p in self.phones)
-        birthday_str = f", Birthday: {self.birthday.value.strftime('%d.%m.%Y')}" if self.birthday else ""
-        return f"Contact name: {self.name.value}, phones: {phones_str}{birthday_str}"
+        phones_str = '; '.join(self._phones)
+        birthday_str = f", Birthday: {self.birthday}" if self.birthday else ""
+        return f"Contact name: {self.name}, phones: {phones_str}{birthday_str}"
+
+_SHARD_COUNT = 27
+
+class AddressBook(MutableMapping):
+    def __init__(self, *args, **kwargs):
+        self._shards = [{} for _ in range(_SHARD_COUNT)]
+        self._bday_index = []
+        self._bday_keys = {}
+        self.update(*args, **kwargs)
+
+    def __setstate__(self, state):
+        # Unpickling skips __init__, so rebuild the derived birthday index
+        self.__dict__.update(state)
+        self._bday_index = []
+        self._bday_keys = {}
+        for name, record in self.items():
+            self._index_birthday(name, record)
+
+    def _shard(self, name):
+        # Keyed on the first character's code point so names in any script
+        # (Latin, Cyrillic, ...) spread across the shards
+        return self._shards[ord(name[0]) % _SHARD_COUNT if name else 0]
+
+    def __getitem__(self, name):
+        return self._shard(name)[name]
+
+    def __setitem__(self, name, record):
+        self._unindex_birthday(name)
+        self._shard(name)[name] = record
+        self._index_birthday(name, record)
+
+    def __delitem__(self, name):
+        self._unindex_birthday(name)
+        del self._shard(name)[name]
+
+    def __iter__(self):
+        for shard in self._shards:
+            yield from shard
+
+    def __len__(self):
+        return sum(map(len, self._shards))
 
-class AddressBook(UserDict):
     def add_record(self, record):
-        self.data[record.name.value] = record
+        self[record.name] = record
 
     def find(self, name):
-        return self.data.get(name)
+        return self._shard(name).get(name)
 
     def delete(self, name):
-        if name in self.data:
-            del self.data[name]
+        if name in self._shard(name):
+            del self[name]
+
+    def add_birthday(self, name, birthday):
+        record = self[name]
+        self._unindex_birthday(name)
+        try:
+            record.add_birthday(birthday)
+        finally:
+            self._index_birthday(name, record)
+
+    def _index_birthday(self, name, record):
+        if record.birthday:
+            self._bday_keys[name] = record._bday_doy
+            insort(self._bday_index, (record._bday_doy, name))
+
+    def _unindex_birthday(self, name):
+        # Remove exactly the entry that was inserted, even if the record changed since
+        key = self._bday_keys.pop(name, None)
+        if key is not None:
+            entry = (key, name)
+            i = bisect_left(self._bday_index, entry)
+            if i < len(self._bday_index) and self._bday_index[i] == entry:
+                del self._bday_index[i]
+
+    def _birthday_candidates(self, start, end):
+        lo = bisect_left(self._bday_index, start, key=itemgetter(0))
+        hi = bisect_right(self._bday_index, end, key=itemgetter(0))
+        if start <= end:
+            return self._bday_index[lo:hi]
+        return self._bday_index[lo:] + self._bday_index[:hi]
+
+    def to_dict(self):
+        return {
+            name: {
+                "phones": list(record._phones),
+                "birthday": str(record.birthday) if record.birthday else None,
+            }
+            for name, record in self.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        book = cls()
+        for name, fields in data.items():
+            record = Record(name)
+            record._phones = dict.fromkeys(fields["phones"])
+            if fields["birthday"]:
+                record.add_birthday(fields["birthday"])
+            book.add_record(record)
+        return book
 
     def get_upcoming_birthdays(self):
-        today = datetime.today()
+        today = date.today()
         next_week = today + timedelta(days=7)
+        start, end = _birthday_key(today), _birthday_key(next_week)
+        if end == _FEB_28 and not isleap(next_week.year):
+            # 29 February birthdays are celebrated on the 28th in non-leap years
+            end = _FEB_29
         upcoming_birthdays = []
-        for record in self.data.values():
-            if record.birthday:
-                birthday_date = record.birthday.value.replace(year=today.year)
-                if birthday_date < today:
-                    birthday_date = birthday_date.replace(year=today.year + 1)
-                if today <= birthday_date <= next_week:
-                    upcoming_birthdays.append((record.name.value, record.birthday))
+        for _, name in self._birthday_candidates(start, end):
+            record = self.find(name)
+            if record and record.birthday:
+                upcoming_birthdays.append((name, record.birthday))
         return upcoming_birthdays
 
 def input_error(func):
-    def wrapper(args, book):
+    @wraps(func)
+    def wrapper(rest, book, _VE=ValueError, _IE=IndexError, _KE=KeyError, _E=Exception):
         try:
-            return func(args, book)
-        except ValueError as e:
+            return func(rest, book)
+        except _VE as e:
             print(e)
-        except IndexError:
+        except _IE:
             print("Invalid number of arguments.")
-        except KeyError:
+        except _KE:
             print("Invalid key.")
-        except Exception as e:
+        except _E as e:
             print(f"An unexpected error occurred: {e}")
     return wrapper
 
 @input_error
-def add_birthday(args, book):
+def hello(rest, book):
+    print("How can I help you?")
+
+@input_error
+def add_contact(rest, book):
+    args = rest.split()
+    if len(args) < 2:
+        print("Invalid number of arguments for 'add' command. Usage: add [ім'я] [телефон]")
+        return
+    name, *phones = args
+    # Validate up front so a bad number leaves the book untouched
+    if not all(map(_valid_phone, phones)):
+        raise ValueError(_INVALID_PHONE_MSG)
+    record = book.find(name)
+    if record:
+        for phone in phones:
+            record.add_phone(phone)
+        print(f"Added phone(s) for existing contact '{name}'.")
+        return True
+    else:
+        new_record = Record(name)
+        for phone in phones:
+            new_record.add_phone(phone)
+        book.add_record(new_record)
+        print(f"New contact '{name}' added with phone(s).")
+        return True
+
+@input_error
+def change_contact(rest, book):
+    args = rest.split()
+    if len(args) != 2:
+        print("Invalid number of arguments for 'change' command. Usage: change [ім'я] [новий телефон]")
+        return
+    name, new_phone = args
+    record = book.find(name)
+    if record:
+        old_phones = record.phones
+        if old_phones:
+            record.edit_phone(old_phones[0], new_phone)
+            print(f"Phone number changed for contact '{name}'.")
+            return True
+        else:
+            print(f"No phone numbers found for {name}.")
+    else:
+        print(f"Contact '{name}' not found.")
+
+@input_error
+def show_phone(rest, book):
+    args = rest.split()
+    if len(args) != 1:
+        print("Invalid number of arguments for 'phone' command. Usage: phone [ім'я]")
+        return
+    name = args[0]
+    record = book.find(name)
+    if record:
+        if record.phones:
+            print(f"Phone(s) for {name}: {', '.join(record.phones)}")
+        else:
+            print(f"No phone numbers found for {name}.")
+    else:
+        print(f"Contact '{name}' not found.")
+
+@input_error
+def show_all(rest, book):
+    if book:
+        sys.stdout.write("All contacts:\n" + "\n".join(map(str, book.values())) + "\n")
+    else:
+        print("No contacts found.")
+
+@input_error
+def add_birthday(rest, book):
+    args = rest.split()
     if len(args) != 2:
         raise IndexError("Invalid number of arguments for 'add-birthday' command. Usage: add-birthday [ім'я] [дата народження]")
     name, birthday = args
     record = book.find(name)
     if record:
-        record.add_birthday(birthday)
+        book.add_birthday(name, birthday)
         print(f"Birthday added for {name}.")
+        return True
     else:
         print(f"Contact '{name}' not found.")
 
 @input_error
-def show_birthday(args, book):
+def show_birthday(rest, book):
+    args = rest.split()
     if len(args) != 1:
         raise IndexError("Invalid number of arguments for 'show-birthday' command. Usage: show-birthday [ім'я]")
     name = args[0]
     record = book.find(name)
     if record and record.birthday:
-        print(f"Birthday for {name}: {record.birthday.value.strftime('%d.%m.%Y')}")
+        print(f"Birthday for {name}: {record.birthday}")
     else:
         print(f"Birthday for contact '{name}' not found.")
 
 @input_error
-def birthdays(args, book):
+def birthdays(rest, book):
     upcoming_birthdays = book.get_upcoming_birthdays()
     if upcoming_birthdays:
         print("Upcoming birthdays:")
         for name, birthday in upcoming_birthdays:
-            print(f"{name}: {birthday.value.strftime('%d.%m.%Y')}")
+            print(f"{name}: {birthday}")
     else:
         print("No upcoming birthdays.")
 
-def save_data(book, filename="addressbook.pkl"):
-    with open(filename, "wb") as f:
-        pickle.dump(book, f)
-
-def load_data(filename="addressbook.pkl"):
+def _dumps(data):
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+def _loads(raw):
+    if orjson:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+COMMANDS = {
+    "hello": hello,
+    "add": add_contact,
+    "change": change_contact,
+    "phone": show_phone,
+    "all": show_all,
+    "add-birthday": add_birthday,
+    "show-birthday": show_birthday,
+    "birthdays": birthdays,
+}
+
+def _file_mode(filename):
+    # mkstemp creates files as 0600; keep the existing mode or the umask default instead
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def save_data(book, filename="addressbook.json"):
+    fd, tmp = tempfile.mkstemp(
+        prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=os.path.dirname(filename) or "."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_dumps(book.to_dict()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, _file_mode(filename))
+        os.replace(tmp, filename)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+class _LegacyObject:
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+class _LegacyUnpickler(pickle.Unpickler):
+    # Old saves pickled the __main__ classes; read them as plain attribute bags
+    def find_class(self, module, name):
+        if module == "__main__" and name in ("AddressBook", "Record", "Name", "Phone", "Birthday"):
+            return _LegacyObject
+        if module == "datetime" and name in ("date", "datetime"):
+            return {"date": date, "datetime": datetime}[name]
+        raise pickle.UnpicklingError(f"Unexpected object in legacy address book: {module}.{name}")
+
+def _load_legacy_data(filename):
+    with open(filename, "rb") as f:
+        legacy = _LegacyUnpickler(f).load()
+    return AddressBook.from_dict({
+        name: {
+            "phones": [phone.value for phone in record.phones],
+            "birthday": record.birthday.value.strftime('%d.%m.%Y') if record.birthday else None,
+        }
+        for name, record in legacy.data.items()
+    })
+
+def load_data(filename="addressbook.json", legacy_filename="addressbook.pkl"):
     try:
         with open(filename, "rb") as f:
-            return pickle.load(f)
+            return AddressBook.from_dict(_loads(f.read()))
+    except FileNotFoundError:
+        pass
+    try:
+        # One-time import of a book saved by the pickle-based version
+        return _load_legacy_data(legacy_filename)
     except FileNotFoundError:
         return AddressBook()
 
@@ -156,88 +410,19 @@ def main():
             print("No command entered. Please try again.")
             continue
 
-        command, *args = user_input.split()
+        command, *rest = user_input.split(None, 1)
+        rest = rest[0] if rest else ""
 
         if command in ["close", "exit"]:
             print("Good bye!")
             save_data(book)
             break
 
-        elif command == "hello":
-            print("How can I help you?")
-
-        elif command == "add":
-            try:
-                if len(args) < 2:
-                    raise IndexError("Invalid number of arguments for 'add' command. Usage: add [ім'я] [телефон]")
-                name, *phones = args
-                record = book.find(name)
-                if record:
-                    for phone in phones:
-                        record.add_phone(phone)
-                    print(f"Added phone(s) for existing contact '{name}'.")
-                else:
-                    new_record = Record(name)
-                    for phone in phones:
-                        new_record.add_phone(phone)
-                    book.add_record(new_record)
-                    print(f"New contact '{name}' added with phone(s).")
-            except ValueError as e:
-                print(e)
-            except IndexError as e:
-                print(e)
-
-        elif command == "change":
-            try:
-                if len(args) != 2:
-                    raise IndexError("Invalid number of arguments for 'change' command. Usage: change [ім'я] [новий телефон]")
-                name, new_phone = args
-                record = book.find(name)
-                if record:
-                    old_phones = [phone.value for phone in record.phones]
-                    if old_phones:
-                        record.edit_phone(old_phones[0], new_phone)
-                        print(f"Phone number changed for contact '{name}'.")
-                    else:
-                        print(f"No phone numbers found for {name}.")
-                else:
-                    print(f"Contact '{name}' not found.")
-            except ValueError as e:
-                print(e)
-            except IndexError as e:
-                print(e)
-
-        elif command == "phone":
-            if len(args) != 1:
-                print("Invalid number of arguments for 'phone' command. Usage: phone [ім'я]")
-            else:
-                name = args[0]
-                record = book.find(name)
-                if record:
-                    if record.phones:
-                        print(f"Phone(s) for {name}: {', '.join(str(phone) for phone in record.phones)}")
-                    else:
-                        print(f"No phone numbers found for {name}.")
-                else:
-                    print(f"Contact '{name}' not found.")
-
-        elif command == "all":
-            if book.data:
-                print("All contacts:")
-                for record in book.data.values():
-                    print(record)
-            else:
-                print("No contacts found.")
-
-        elif command == "add-birthday":
-            add_birthday(args, book)
-
-        elif command == "show-birthday":
-            show_birthday(args, book)
-
-        elif command == "birthdays":
-            birthdays(args, book)
-
+        handler = COMMANDS.get(command)
+        if handler:
+            # Handlers return True only when they changed the book
+            if handler(rest, book):
+                save_data(book)
         else:
             print("Invalid command.")
 